@@ -1,6 +1,9 @@
+"""Configuration module for the Python Analytics Service"""
 import os
+from typing import Optional
+import httpx
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
 
 # Load environment variables from parent .env file
 load_dotenv(dotenv_path='../../.env')
@@ -12,10 +15,43 @@ supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
 if not supabase_url or not supabase_key:
     raise ValueError('Missing Supabase environment variables. Please check your .env file.')
 
-# Create Supabase client with service role key (bypasses RLS)
-# Use minimal configuration to avoid compatibility issues
-supabase: Client = create_client(supabase_url, supabase_key)
+# Keep more connections alive (and for longer) than the httpx defaults
+# so concurrent and repeated dashboard requests reuse them instead of reconnecting
+http_pool_limits = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30)
 
-def get_supabase_client() -> Client:
+# Same timeout as postgrest-py's default client; a passed-in httpx client otherwise falls back to 5s
+http_timeout = httpx.Timeout(120)
+
+# Async Supabase client with service role key (bypasses RLS), created once on startup
+supabase: Optional[AsyncClient] = None
+
+async def init_supabase_client() -> AsyncClient:
+    """Create the shared async Supabase client instance"""
+    global supabase
+    if supabase is None:
+        supabase = await acreate_client(
+            supabase_url,
+            supabase_key,
+            options=AsyncClientOptions(
+                httpx_client=httpx.AsyncClient(
+                    limits=http_pool_limits,
+                    timeout=http_timeout,
+                    follow_redirects=True,
+                    http2=True
+                )
+            )
+        )
+    return supabase
+
+async def close_supabase_client():
+    """Close the HTTP connections of the shared Supabase client"""
+    global supabase
+    if supabase is not None:
+        await supabase.options.httpx_client.aclose()
+        supabase = None
+
+def get_supabase_client() -> AsyncClient:
     """Get the Supabase client instance"""
+    if supabase is None:
+        raise RuntimeError('Supabase client is not initialized. Call init_supabase_client() on startup.')
     return supabase
@@ -1,22 +1,44 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+import asyncio
 import logging
-from datetime import datetime
 import os
+from contextlib import asynccontextmanager
+from config.database import init_supabase_client, close_supabase_client
 from routers.dashboard import router as dashboard_router
+from services.clock import current_timestamp, tick_current_timestamp
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Application startup/shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the shared async Supabase client
+    await init_supabase_client()
+    # Initialize in-memory response cache for read-only dashboard endpoints
+    FastAPICache.init(InMemoryBackend(), prefix="izaj-analytics")
+    # Refresh the cached response timestamp in the background
+    clock_task = asyncio.create_task(tick_current_timestamp())
+    
+    yield
+    
+    clock_task.cancel()
+    await close_supabase_client()
+
 # Create FastAPI application
 app = FastAPI(
     title="IZAJ Analytics API",
     description="Python FastAPI service for dashboard analytics",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -53,14 +75,21 @@ if web_app_url:
 if next_public_url:
     allowed_origins.append(next_public_url)
 
+# Normalize and dedupe once at startup; CORSMiddleware checks membership on every request
+allowed_origins = frozenset(origin.rstrip("/") for origin in allowed_origins)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # Let browsers cache preflight responses for 24 hours
 )
 
+# Compress JSON responses (sales report, best selling) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # Include routers
 app.include_router(dashboard_router)
 
@@ -83,7 +112,7 @@ async def root():
     return {
         "success": True,
         "message": "IZAJ Analytics API is running!",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": current_timestamp(),
         "docs": "/docs"
     }
 
@@ -93,7 +122,7 @@ async def health_check():
     return {
         "success": True,
         "message": "Python Analytics Service is healthy!",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": current_timestamp()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+-- Aggregation functions used by the Python Analytics Service
+-- Run this in the Supabase SQL Editor. Safe to run multiple times.
+
+-- Customer counts (excluding admin users), order counts per status and
+-- completed-order earnings in a single row.
+-- Called by AnalyticsService.get_dashboard_stats via supabase.rpc('dashboard_stats', ...)
+-- Dropped first because CREATE OR REPLACE cannot change the returned columns.
+DROP FUNCTION IF EXISTS dashboard_stats(timestamptz);
+
+CREATE FUNCTION dashboard_stats(start_date timestamptz)
+RETURNS TABLE (
+    total_customers bigint,
+    period_customers bigint,
+    total_orders bigint,
+    pending bigint,
+    approved bigint,
+    in_transit bigint,
+    complete bigint,
+    cancelled bigint,
+    total_earnings numeric,
+    period_earnings numeric
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH customer_totals AS (
+        SELECT
+            COUNT(*) AS total_customers,
+            COUNT(*) FILTER (WHERE p.created_at >= start_date) AS period_customers
+        FROM profiles p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM "adminUser" a WHERE a.user_id::text = p.id::text
+        )
+    ),
+    order_totals AS (
+        SELECT
+            COUNT(*) AS total_orders,
+            COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+            COUNT(*) FILTER (WHERE status = 'approved') AS approved,
+            COUNT(*) FILTER (WHERE status = 'in_transit') AS in_transit,
+            COUNT(*) FILTER (WHERE status = 'complete') AS complete,
+            COUNT(*) FILTER (WHERE status = 'cancelled') AS cancelled,
+            COALESCE(SUM(total_amount) FILTER (WHERE status = 'complete'), 0)::numeric AS total_earnings,
+            COALESCE(SUM(total_amount) FILTER (WHERE status = 'complete' AND created_at >= start_date), 0)::numeric AS period_earnings
+        FROM orders
+    )
+    SELECT
+        c.total_customers,
+        c.period_customers,
+        o.total_orders,
+        o.pending,
+        o.approved,
+        o.in_transit,
+        o.complete,
+        o.cancelled,
+        o.total_earnings,
+        o.period_earnings
+    FROM customer_totals c
+    CROSS JOIN order_totals o;
+$$;
+
+-- Monthly sales totals for completed orders, keyed by completion date (UTC).
+-- Called by AnalyticsService.get_sales_report via supabase.rpc('sales_report_monthly', ...)
+CREATE OR REPLACE FUNCTION sales_report_monthly(report_year integer)
+RETURNS TABLE (
+    month integer,
+    sales numeric,
+    orders bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        EXTRACT(MONTH FROM date_trunc('month', completed_at AT TIME ZONE 'UTC'))::integer,
+        COALESCE(SUM(total_amount), 0)::numeric,
+        COUNT(*)
+    FROM orders
+    WHERE status = 'complete'
+      AND completed_at >= make_timestamptz(report_year, 1, 1, 0, 0, 0, 'UTC')
+      AND completed_at < make_timestamptz(report_year + 1, 1, 1, 0, 0, 0, 'UTC')
+    GROUP BY 1
+    ORDER BY 1;
+$$;
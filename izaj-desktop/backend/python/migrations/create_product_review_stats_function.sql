@@ -0,0 +1,21 @@
+-- Review count and average rating per product for the Python Analytics Service
+-- Run this in the Supabase SQL Editor. Safe to run multiple times.
+
+-- Called by AnalyticsService.get_best_selling_products via supabase.rpc('product_review_stats', ...)
+CREATE OR REPLACE FUNCTION product_review_stats(ids text[])
+RETURNS TABLE (
+    product_id text,
+    review_count bigint,
+    average_rating numeric(3,1)
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        reviews.product_id::text,
+        COUNT(*),
+        AVG(reviews.rating)::numeric(3,1)
+    FROM reviews
+    WHERE reviews.product_id::text = ANY(ids)
+    GROUP BY reviews.product_id;
+$$;
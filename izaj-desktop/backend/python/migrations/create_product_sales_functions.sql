@@ -0,0 +1,59 @@
+-- Top-N product and category sales for the Python Analytics Service
+-- Run this in the Supabase SQL Editor. Safe to run multiple times.
+
+-- Best selling products from completed orders, sorted and limited in the database.
+-- order_items has no category column, so the optional category filter is resolved
+-- through products (same lookup as the Node.js orders service).
+-- Called by AnalyticsService.get_best_selling_products via supabase.rpc('best_selling_products', ...)
+CREATE OR REPLACE FUNCTION best_selling_products(result_limit integer DEFAULT 3, category_filter text DEFAULT NULL)
+RETURNS TABLE (
+    product_id text,
+    product_name text,
+    total_quantity numeric,
+    total_revenue numeric,
+    order_count bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        oi.product_id::text,
+        oi.product_name::text,
+        SUM(oi.quantity)::numeric,
+        SUM(oi.quantity * oi.unit_price)::numeric,
+        COUNT(DISTINCT oi.order_id)
+    FROM order_items oi
+    JOIN orders o ON o.id = oi.order_id
+    LEFT JOIN products p ON p.product_id::text = oi.product_id::text
+    WHERE o.status = 'complete'
+      AND (category_filter IS NULL OR p.category::text = category_filter)
+    GROUP BY oi.product_id, oi.product_name
+    ORDER BY 3 DESC
+    LIMIT result_limit;
+$$;
+
+-- Sales per category from completed orders, sorted and limited in the database.
+-- The category is the first word of the product name until order_items has a proper category column.
+-- Called by AnalyticsService.get_category_sales via supabase.rpc('category_sales', ...)
+CREATE OR REPLACE FUNCTION category_sales(result_limit integer DEFAULT 3)
+RETURNS TABLE (
+    category text,
+    total_quantity numeric,
+    total_revenue numeric,
+    product_count bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        COALESCE(NULLIF(split_part(btrim(oi.product_name), ' ', 1), ''), 'Uncategorized'),
+        SUM(oi.quantity)::numeric,
+        SUM(oi.quantity * oi.unit_price)::numeric,
+        COUNT(DISTINCT oi.product_id)
+    FROM order_items oi
+    JOIN orders o ON o.id = oi.order_id
+    WHERE o.status = 'complete'
+    GROUP BY 1
+    ORDER BY 2 DESC
+    LIMIT result_limit;
+$$;
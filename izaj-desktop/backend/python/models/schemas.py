@@ -1,14 +1,19 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+# Base for all response models: instances are immutable once constructed,
+# since cached sales reports are shared between requests
+class ResponseModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
 # Dashboard Stats Models
-class CustomerStats(BaseModel):
+class CustomerStats(ResponseModel):
     total: int
     period: int
     percentage: float
 
-class OrderStats(BaseModel):
+class OrderStats(ResponseModel):
     pending: int
     approved: int
     in_transit: int
@@ -16,36 +21,36 @@ class OrderStats(BaseModel):
     cancelled: int
     total: int
 
-class EarningsStats(BaseModel):
+class EarningsStats(ResponseModel):
     total: str
     period: str
     growth: str
     currency: str
 
-class DashboardStats(BaseModel):
+class DashboardStats(ResponseModel):
     customers: CustomerStats
     orders: OrderStats
     earnings: EarningsStats
 
 # Sales Report Models
-class SalesReportMonth(BaseModel):
+class SalesReportMonth(ResponseModel):
     month: str
     sales: float
     orders: int
     growth: Optional[str] = None
 
-class SalesReportSummary(BaseModel):
+class SalesReportSummary(ResponseModel):
     totalSales: str
     totalOrders: int
     averageGrowth: str
 
-class SalesReport(BaseModel):
+class SalesReport(ResponseModel):
     monthly: List[SalesReportMonth]
     summary: SalesReportSummary
     year: int
 
 # Best Selling Product Models
-class BestSellingProduct(BaseModel):
+class BestSellingProduct(ResponseModel):
     product_id: str
     product_name: str
     total_quantity: int
@@ -55,38 +60,38 @@ class BestSellingProduct(BaseModel):
     average_rating: float
 
 # Category Sales Models
-class CategorySales(BaseModel):
+class CategorySales(ResponseModel):
     category: str
     total_quantity: int
     total_revenue: float
     product_count: int
 
 # API Response Models
-class DashboardStatsResponse(BaseModel):
+class DashboardStatsResponse(ResponseModel):
     success: bool
     stats: DashboardStats
     period: str
     timestamp: str
 
-class SalesReportResponse(BaseModel):
+class SalesReportResponse(ResponseModel):
     success: bool
     salesReport: SalesReport
 
-class BestSellingResponse(BaseModel):
+class BestSellingResponse(ResponseModel):
     success: bool
     bestSelling: List[BestSellingProduct]
     total: int
 
-class CategorySalesResponse(BaseModel):
+class CategorySalesResponse(ResponseModel):
     success: bool
     categorySales: List[CategorySales]
 
-class MonthlyEarningsResponse(BaseModel):
+class MonthlyEarningsResponse(ResponseModel):
     success: bool
     monthlyEarnings: List[float]
     year: int
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(ResponseModel):
     success: bool
     error: str
     details: Optional[str] = None
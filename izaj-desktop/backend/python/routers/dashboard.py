@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi_cache.decorator import cache
 from typing import Optional
 from datetime import datetime
 import logging
 
 from services.analytics import AnalyticsService
+from services.clock import current_timestamp
 from models.schemas import (
     DashboardStatsResponse, SalesReportResponse, BestSellingResponse,
     CategorySalesResponse, MonthlyEarningsResponse, ErrorResponse
@@ -17,6 +19,7 @@ router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 analytics_service = AnalyticsService()
 
 @router.get("/stats", response_model=DashboardStatsResponse)
+@cache(expire=60)
 async def get_dashboard_stats(period: str = Query("month", description="Time period: week, month, or year")):
     """Get overall dashboard statistics"""
     try:
@@ -31,7 +34,7 @@ async def get_dashboard_stats(period: str = Query("month", description="Time per
             success=True,
             stats=stats,
             period=period,
-            timestamp=datetime.now().isoformat()
+            timestamp=current_timestamp()
         )
     
     except Exception as e:
@@ -39,6 +42,7 @@ async def get_dashboard_stats(period: str = Query("month", description="Time per
         raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard statistics: {str(e)}")
 
 @router.get("/sales-report", response_model=SalesReportResponse)
+@cache(expire=300)
 async def get_sales_report(year: Optional[int] = Query(None, description="Year for sales report")):
     """Get monthly sales data for chart"""
     try:
@@ -59,6 +63,7 @@ async def get_sales_report(year: Optional[int] = Query(None, description="Year f
         raise HTTPException(status_code=500, detail=f"Failed to fetch sales report: {str(e)}")
 
 @router.get("/best-selling", response_model=BestSellingResponse)
+@cache(expire=300)
 async def get_best_selling_products(
     limit: int = Query(3, description="Number of products to return"),
     category: Optional[str] = Query(None, description="Filter by category")
@@ -80,6 +85,7 @@ async def get_best_selling_products(
         raise HTTPException(status_code=500, detail=f"Failed to fetch best selling products: {str(e)}")
 
 @router.get("/monthly-earnings", response_model=MonthlyEarningsResponse)
+@cache(expire=300)
 async def get_monthly_earnings(year: Optional[int] = Query(None, description="Year for monthly earnings")):
     """Get monthly earnings data"""
     try:
@@ -101,6 +107,7 @@ async def get_monthly_earnings(year: Optional[int] = Query(None, description="Ye
         raise HTTPException(status_code=500, detail=f"Failed to fetch monthly earnings: {str(e)}")
 
 @router.get("/category-sales", response_model=CategorySalesResponse)
+@cache(expire=300)
 async def get_category_sales(limit: int = Query(3, description="Number of categories to return")):
     """Get sales data grouped by category"""
     try:
@@ -123,5 +130,5 @@ async def health_check():
     return {
         "success": True,
         "message": "Python Analytics Service is running!",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": current_timestamp()
     }
@@ -1,8 +1,8 @@
-import pandas as pd
-import numpy as np
 import asyncio
+from functools import partial
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from supabase import AsyncClient
 from config.database import get_supabase_client
 from models.schemas import (
     DashboardStats, CustomerStats, OrderStats, EarningsStats,
@@ -10,9 +10,23 @@ from models.schemas import (
     BestSellingProduct, CategorySales
 )
 
+MONTH_NAMES = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+# All earnings are reported in Philippine pesos
+_make_earnings = partial(EarningsStats, currency="PHP")
+
 class AnalyticsService:
     def __init__(self):
-        self.supabase = get_supabase_client()
+        # Sales reports per year, tagged with the completed-orders snapshot they were built from
+        self._sales_cache: Dict[int, Tuple[Tuple[int, Optional[str]], SalesReport]] = {}
+    
+    @property
+    def supabase(self) -> AsyncClient:
+        """Shared async Supabase client (created on application startup)"""
+        return get_supabase_client()
     
     async def get_dashboard_stats(self, period: str = 'month') -> DashboardStats:
         """Get overall dashboard statistics"""
@@ -26,68 +40,30 @@ class AnalyticsService:
         else:  # month
             start_date = now - timedelta(days=30)
         
-        # Run independent queries in parallel
-        admin_task = asyncio.to_thread(
-            lambda: self.supabase.table('adminUser').select('user_id').execute()
-        )
-        profiles_task = asyncio.to_thread(
-            lambda: self.supabase.table('profiles').select('id, created_at').execute()
-        )
-        orders_task = asyncio.to_thread(
-            lambda: self.supabase.table('orders').select('status, total_amount, created_at').execute()
-        )
-        
-        admin_users_response, customer_response, orders_response = await asyncio.gather(
-            admin_task, profiles_task, orders_task
-        )
+        # Customer, order and earnings totals are aggregated in Postgres (single row)
+        stats_response = await self.supabase.rpc('dashboard_stats', {'start_date': start_date.isoformat()}).execute()
+        stats_row = (stats_response.data or [{}])[0]
         
-        admin_user_ids = [admin['user_id'] for admin in (admin_users_response.data or [])]
-        customer_profiles = customer_response.data or []
+        # Customer counts exclude admin users
+        total_customers = int(stats_row.get('total_customers') or 0)
+        period_customers = int(stats_row.get('period_customers') or 0)
         
-        # Filter out admin users
-        total_customers = len([p for p in customer_profiles if p.get('id') not in admin_user_ids])
+        order_stats = {
+            'pending': int(stats_row.get('pending') or 0),
+            'approved': int(stats_row.get('approved') or 0),
+            'in_transit': int(stats_row.get('in_transit') or 0),
+            'complete': int(stats_row.get('complete') or 0),
+            'cancelled': int(stats_row.get('cancelled') or 0),
+            'total': int(stats_row.get('total_orders') or 0)
+        }
         
-        # Get period customers count (in date range, excluding admin users)
-        period_customer_profiles = [
-            p for p in customer_profiles 
-            if p.get('created_at') and p.get('created_at') >= start_date.isoformat()
-        ]
-        period_customers = len([p for p in period_customer_profiles if p.get('id') not in admin_user_ids])
+        # Earnings - ONLY from completed orders
+        total_earnings = float(stats_row.get('total_earnings') or 0)
+        period_earnings = float(stats_row.get('period_earnings') or 0)
         
-        # Get order statistics
-        orders_data = orders_response.data or []
-        
-        # Process orders with pandas for efficiency
-        if orders_data:
-            df_orders = pd.DataFrame(orders_data)
-            df_orders['total_amount'] = pd.to_numeric(df_orders['total_amount'], errors='coerce').fillna(0)
-            df_orders['created_at'] = pd.to_datetime(df_orders['created_at']).dt.tz_localize(None).dt.tz_localize(None)
-            
-            # Calculate order statistics
-            order_stats = df_orders['status'].value_counts().to_dict()
-            order_stats = {
-                'pending': order_stats.get('pending', 0),
-                'approved': order_stats.get('approved', 0),
-                'in_transit': order_stats.get('in_transit', 0),
-                'complete': order_stats.get('complete', 0),
-                'cancelled': order_stats.get('cancelled', 0),
-                'total': len(df_orders)
-            }
-            
-            # Calculate earnings - ONLY from completed orders
-            completed_orders = df_orders[df_orders['status'] == 'complete']
-            total_earnings = completed_orders['total_amount'].sum()
-            period_earnings = completed_orders[completed_orders['created_at'] >= start_date]['total_amount'].sum()
-            
-            # Calculate growth
-            previous_period_earnings = total_earnings - period_earnings
-            earnings_growth = ((period_earnings - previous_period_earnings) / previous_period_earnings * 100) if previous_period_earnings > 0 else 0
-        else:
-            order_stats = {
-                'pending': 0, 'approved': 0, 'in_transit': 0, 
-                'complete': 0, 'cancelled': 0, 'total': 0
-            }
-            total_earnings = period_earnings = earnings_growth = 0
+        # Calculate growth
+        previous_period_earnings = total_earnings - period_earnings
+        earnings_growth = ((period_earnings - previous_period_earnings) / previous_period_earnings * 100) if previous_period_earnings > 0 else 0
         
         return DashboardStats(
             customers=CustomerStats(
@@ -96,11 +72,10 @@ class AnalyticsService:
                 percentage=round((period_customers / total_customers * 100) if total_customers > 0 else 0, 1)
             ),
             orders=OrderStats(**order_stats),
-            earnings=EarningsStats(
-                total=f"{total_earnings:.2f}",
-                period=f"{period_earnings:.2f}",
-                growth=f"{earnings_growth:.1f}",
-                currency="PHP"
+            earnings=_make_earnings(
+                total=format(total_earnings, '.2f'),
+                period=format(period_earnings, '.2f'),
+                growth=format(earnings_growth, '.1f')
             )
         )
     
@@ -109,85 +84,21 @@ class AnalyticsService:
         if year is None:
             year = datetime.now().year
         
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31, 23, 59, 59)
-        
-        # Get completed orders for the year
-        start_iso = start_date.isoformat()
-        end_iso = end_date.isoformat()
+        # Reuse the cached report while no order has been completed (or un-completed) since
+        snapshot = await self._get_completed_orders_snapshot()
+        cached = self._sales_cache.get(year)
+        if cached and cached[0] == snapshot:
+            return cached[1]
         
-        orders_response = (
-            self.supabase.table('orders')
-            .select('total_amount, completed_at, created_at, status')
-            .gte('completed_at', start_iso)
-            .lte('completed_at', end_iso)
-            .eq('status', 'complete')
-            .execute()
+        # Monthly totals for the year and the previous year (for YoY comparison), in parallel
+        monthly_totals, prev_monthly_totals = await asyncio.gather(
+            self._get_monthly_sales_totals(year),
+            self._get_monthly_sales_totals(year - 1)
         )
-        orders_data = orders_response.data or []
-        monthly_totals = {i: {'sales': 0.0, 'orders': 0} for i in range(1, 13)}
-
-        # Also fetch previous year's completed orders for YoY comparison
-        prev_year = year - 1
-        prev_start_date = datetime(prev_year, 1, 1)
-        prev_end_date = datetime(prev_year, 12, 31, 23, 59, 59)
-        prev_start_iso = prev_start_date.isoformat()
-        prev_end_iso = prev_end_date.isoformat()
-
-        prev_orders_response = (
-            self.supabase.table('orders')
-            .select('total_amount, completed_at, created_at, status')
-            .gte('completed_at', prev_start_iso)
-            .lte('completed_at', prev_end_iso)
-            .eq('status', 'complete')
-            .execute()
-        )
-        prev_orders_data = prev_orders_response.data or []
-        prev_monthly_totals = {i: {'sales': 0.0, 'orders': 0} for i in range(1, 13)}
-        
-        # Process with pandas
-        if orders_data:
-            df_orders = pd.DataFrame(orders_data)
-            df_orders['total_amount'] = pd.to_numeric(df_orders['total_amount'], errors='coerce').fillna(0)
-            # Fallback to created_at when completed_at missing
-            df_orders['completed_at'] = df_orders['completed_at'].fillna(df_orders['created_at'])
-            df_orders['completed_at'] = pd.to_datetime(df_orders['completed_at']).dt.tz_localize(None)
-            df_orders['month'] = df_orders['completed_at'].dt.month
-            
-            # Group by month
-            monthly_data = (
-                df_orders.groupby('month')
-                .agg({'total_amount': 'sum', 'completed_at': 'count'})
-                .rename(columns={'completed_at': 'orders'})
-            )
-            for month, data in monthly_data.iterrows():
-                monthly_totals[int(month)] = {
-                    'sales': float(data['total_amount']),
-                    'orders': int(data['orders'])
-                }
-
-        # Process previous year data with pandas
-        if prev_orders_data:
-            df_prev_orders = pd.DataFrame(prev_orders_data)
-            df_prev_orders['total_amount'] = pd.to_numeric(df_prev_orders['total_amount'], errors='coerce').fillna(0)
-            df_prev_orders['completed_at'] = df_prev_orders['completed_at'].fillna(df_prev_orders['created_at'])
-            df_prev_orders['completed_at'] = pd.to_datetime(df_prev_orders['completed_at']).dt.tz_localize(None)
-            df_prev_orders['month'] = df_prev_orders['completed_at'].dt.month
-
-            prev_monthly_data = (
-                df_prev_orders.groupby('month')
-                .agg({'total_amount': 'sum', 'completed_at': 'count'})
-                .rename(columns={'completed_at': 'orders'})
-            )
-            for month, data in prev_monthly_data.iterrows():
-                prev_monthly_totals[int(month)] = {
-                    'sales': float(data['total_amount']),
-                    'orders': int(data['orders'])
-                }
         
         monthly_array = []
         for i in range(1, 13):
-            month_name = datetime(year, i, 1).strftime('%B')
+            month_name = MONTH_NAMES[i - 1]
             sales = monthly_totals[i]['sales']
             orders = monthly_totals[i]['orders']
             prev_sales = prev_monthly_totals[i]['sales']
@@ -196,7 +107,7 @@ class AnalyticsService:
             growth = None
             if prev_sales is not None:
                 if prev_sales > 0:
-                    growth = f"{((sales - prev_sales) / prev_sales * 100):.1f}"
+                    growth = format((sales - prev_sales) / prev_sales * 100, '.1f')
                 elif prev_sales == 0:
                     growth = "0.0" if sales == 0 else None
             
@@ -213,90 +124,90 @@ class AnalyticsService:
         # Annual (YoY) growth: compare total sales to previous year's total sales
         total_prev_sales = sum(prev_monthly_totals[i]['sales'] for i in range(1, 13))
         if total_prev_sales > 0:
-            average_growth = f"{((total_sales - total_prev_sales) / total_prev_sales * 100):.1f}"
+            average_growth = format((total_sales - total_prev_sales) / total_prev_sales * 100, '.1f')
         else:
             # If there is no baseline, treat growth as 0.0 (or N/A on the UI side if desired)
             average_growth = "0.0"
         
-        return SalesReport(
+        sales_report = SalesReport(
             monthly=monthly_array,
             summary=SalesReportSummary(
-                totalSales=f"{total_sales:.2f}",
+                totalSales=format(total_sales, '.2f'),
                 totalOrders=total_orders,
                 averageGrowth=average_growth
             ),
             year=year
         )
-    
-    async def get_best_selling_products(self, limit: int = 3, category: str = None) -> List[BestSellingProduct]:
-        """Get best selling products"""
-        # First get completed order IDs
-        orders_response = self.supabase.table('orders').select('id').eq('status', 'complete').execute()
-        completed_order_ids = [order['id'] for order in (orders_response.data or [])]
+        self._sales_cache[year] = (snapshot, sales_report)
         
-        if not completed_order_ids:
-            return []
+        return sales_report
+    
+    async def _get_completed_orders_snapshot(self) -> Tuple[int, Optional[str]]:
+        """Get the completed order count and latest completed_at (1-row probe query)"""
+        response = await (
+            self.supabase.table('orders')
+            .select('completed_at', count='exact')
+            .eq('status', 'complete')
+            .not_.is_('completed_at', 'null')
+            .order('completed_at', desc=True)
+            .limit(1)
+            .execute()
+        )
+        latest_completed_at = response.data[0]['completed_at'] if response.data else None
         
-        # Get order items from completed orders
-        query = self.supabase.table('order_items').select('product_id, product_name, quantity, unit_price, order_id').in_('order_id', completed_order_ids)
+        return response.count or 0, latest_completed_at
+    
+    async def _get_monthly_sales_totals(self, year: int) -> Dict[int, Dict[str, Any]]:
+        """Get completed sales and order counts per month, aggregated in Postgres"""
+        response = await self.supabase.rpc('sales_report_monthly', {'report_year': year}).execute()
         
-        if category:
-            query = query.eq('category', category)
+        monthly_totals = {i: {'sales': 0.0, 'orders': 0} for i in range(1, 13)}
+        for row in response.data or []:
+            monthly_totals[int(row['month'])] = {
+                'sales': float(row['sales'] or 0),
+                'orders': int(row['orders'] or 0)
+            }
         
-        response = query.execute()
-        order_items = response.data or []
+        return monthly_totals
+    
+    async def get_best_selling_products(self, limit: int = 3, category: str = None) -> List[BestSellingProduct]:
+        """Get best selling products"""
+        # Aggregate, sort and limit in Postgres so only the top products are returned
+        response = await self.supabase.rpc(
+            'best_selling_products', {'result_limit': limit, 'category_filter': category}
+        ).execute()
+        product_stats = response.data or []
         
-        if not order_items:
+        if not product_stats:
             return []
         
-        # Process with pandas
-        df_items = pd.DataFrame(order_items)
-        df_items['quantity'] = pd.to_numeric(df_items['quantity'], errors='coerce').fillna(0)
-        df_items['unit_price'] = pd.to_numeric(df_items['unit_price'], errors='coerce').fillna(0)
-        df_items['revenue'] = df_items['quantity'] * df_items['unit_price']
-        
-        # Group by product
-        product_stats = df_items.groupby(['product_id', 'product_name']).agg({
-            'quantity': 'sum',
-            'revenue': 'sum',
-            'product_id': 'count'  # order count
-        }).rename(columns={'product_id': 'order_count'}).reset_index()
-        
-        # Sort by quantity and limit
-        product_stats = product_stats.sort_values('quantity', ascending=False).head(limit)
-        
-        # Batch fetch all reviews for the products (single query instead of N queries)
-        product_ids = product_stats['product_id'].tolist()
-        reviews_by_product = {}
+        # Aggregate review stats for all products in a single query
+        product_ids = [row['product_id'] for row in product_stats]
+        review_stats = {}
         
         try:
-            reviews_response = self.supabase.table('reviews').select('product_id, rating').in_('product_id', product_ids).execute()
-            reviews_data = reviews_response.data or []
-            
-            # Group reviews by product_id
-            for review in reviews_data:
-                pid = review['product_id']
-                if pid not in reviews_by_product:
-                    reviews_by_product[pid] = []
-                reviews_by_product[pid].append(review['rating'])
+            reviews_response = await self.supabase.rpc('product_review_stats', {'ids': product_ids}).execute()
+            for review in reviews_response.data or []:
+                review_stats[review['product_id']] = (
+                    int(review['review_count']),
+                    float(review['average_rating'] or 0)
+                )
         except Exception:
-            # Reviews table doesn't exist - skip reviews entirely
+            # Reviews table or review stats function missing - skip reviews entirely
             pass
         
         # Build response
         best_selling = []
-        for _, row in product_stats.iterrows():
+        for row in product_stats:
             product_id = row['product_id']
-            ratings = reviews_by_product.get(product_id, [])
-            review_count = len(ratings)
-            average_rating = round(sum(ratings) / len(ratings), 1) if ratings else 0
+            review_count, average_rating = review_stats.get(product_id, (0, 0))
             
             best_selling.append(BestSellingProduct(
                 product_id=product_id,
                 product_name=row['product_name'],
-                total_quantity=int(row['quantity']),
-                total_revenue=float(row['revenue']),
-                order_count=int(row['order_count']),
+                total_quantity=int(row['total_quantity'] or 0),
+                total_revenue=float(row['total_revenue'] or 0),
+                order_count=int(row['order_count'] or 0),
                 review_count=review_count,
                 average_rating=average_rating
             ))
@@ -312,71 +223,32 @@ class AnalyticsService:
         end_date = datetime(year, 12, 31, 23, 59, 59)
         
         # Get completed orders
-        orders_response = self.supabase.table('orders').select('total_amount, created_at').gte('created_at', start_date.isoformat()).lte('created_at', end_date.isoformat()).eq('status', 'complete').execute()
+        orders_response = await self.supabase.table('orders').select('total_amount, created_at').gte('created_at', start_date.isoformat()).lte('created_at', end_date.isoformat()).eq('status', 'complete').execute()
         orders_data = orders_response.data or []
         
         # Initialize monthly earnings
         monthly_earnings = [0.0] * 12
         
-        if orders_data:
-            df_orders = pd.DataFrame(orders_data)
-            df_orders['total_amount'] = pd.to_numeric(df_orders['total_amount'], errors='coerce').fillna(0)
-            df_orders['created_at'] = pd.to_datetime(df_orders['created_at']).dt.tz_localize(None)
-            df_orders['month'] = df_orders['created_at'].dt.month
-            
-            # Group by month and sum
-            monthly_totals = df_orders.groupby('month')['total_amount'].sum()
-            
-            for month, total in monthly_totals.items():
-                monthly_earnings[month - 1] = float(total)
+        # Single pass over the rows; created_at is an ISO string ("YYYY-MM-DD...")
+        for order in orders_data:
+            month = int(order['created_at'][5:7]) - 1
+            monthly_earnings[month] += float(order['total_amount'] or 0)
         
         return monthly_earnings
     
     async def get_category_sales(self, limit: int = 3) -> List[CategorySales]:
         """Get sales data grouped by category"""
-        # First get completed order IDs
-        orders_response = self.supabase.table('orders').select('id').eq('status', 'complete').execute()
-        completed_order_ids = [order['id'] for order in (orders_response.data or [])]
-        
-        if not completed_order_ids:
-            return []
-        
-        # Get order items from completed orders (without category column for now)
-        response = self.supabase.table('order_items').select('product_id, product_name, quantity, unit_price').in_('order_id', completed_order_ids).execute()
-        order_items = response.data or []
-        
-        if not order_items:
-            return []
-        
-        # Process with pandas
-        df_items = pd.DataFrame(order_items)
-        df_items['quantity'] = pd.to_numeric(df_items['quantity'], errors='coerce').fillna(0)
-        df_items['unit_price'] = pd.to_numeric(df_items['unit_price'], errors='coerce').fillna(0)
-        df_items['revenue'] = df_items['quantity'] * df_items['unit_price']
-        
-        # For now, group by product_name as a simple category
-        # TODO: Add proper category column to order_items table
-        df_items['category'] = df_items['product_name'].str.split().str[0]  # Use first word as category
-        df_items['category'] = df_items['category'].fillna('Uncategorized')
-        
-        # Group by category
-        category_stats = df_items.groupby('category').agg({
-            'quantity': 'sum',
-            'revenue': 'sum',
-            'product_id': 'nunique'  # unique product count
-        }).rename(columns={'product_id': 'product_count'}).reset_index()
-        
-        # Sort by quantity and limit
-        category_stats = category_stats.sort_values('quantity', ascending=False).head(limit)
+        # Aggregate, sort and limit in Postgres so only the top categories are returned
+        response = await self.supabase.rpc('category_sales', {'result_limit': limit}).execute()
         
         # Convert to CategorySales objects
         category_sales = []
-        for _, row in category_stats.iterrows():
+        for row in response.data or []:
             category_sales.append(CategorySales(
                 category=row['category'],
-                total_quantity=int(row['quantity']),
-                total_revenue=float(row['revenue']),
-                product_count=int(row['product_count'])
+                total_quantity=int(row['total_quantity'] or 0),
+                total_revenue=float(row['total_revenue'] or 0),
+                product_count=int(row['product_count'] or 0)
             ))
         
         return category_sales
@@ -0,0 +1,17 @@
+"""Cached wall-clock timestamp for API responses"""
+import asyncio
+from datetime import datetime
+
+# Refreshed once per second by tick_current_timestamp() so endpoints don't format a new timestamp per request
+CURRENT_ISO = datetime.now().isoformat()
+
+async def tick_current_timestamp():
+    """Update CURRENT_ISO once per second (run as a background task on startup)"""
+    global CURRENT_ISO
+    while True:
+        CURRENT_ISO = datetime.now().isoformat()
+        await asyncio.sleep(1)
+
+def current_timestamp() -> str:
+    """Get the cached ISO timestamp (refreshed once per second, so up to 1s old)"""
+    return CURRENT_ISO